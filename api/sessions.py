@@ -12,6 +12,7 @@ from core.schemas.session import (
 from core.database import get_supabase_client
 from core.auth import decode_token
 from typing import List, Optional
+import asyncio
 import uuid
 from uuid import UUID
 from service.storage_service import FileStorageService
@@ -63,8 +64,9 @@ async def create_session(
         # Create storage path: user_id/session_id/filename
         storage_path = f"{user_id}/{session_id}/{file.filename}"
         
-        # Upload file to storage
-        file_storage_path = FileStorageService.upload_file(
+        # Upload file to storage; the Supabase client is blocking, so keep it off the event loop
+        file_storage_path = await asyncio.to_thread(
+            FileStorageService.upload_file,
             file_path=storage_path,
             file_content=file_content
         )
@@ -110,8 +112,14 @@ async def get_session(
     supabase = get_supabase_client()
     
     try:
-        # Get session
-        session_response = supabase.table("translation_sessions").select("*").eq("id", session_id).execute()
+        # Get session together with its messages in a single round-trip
+        session_response = (
+            supabase.table("translation_sessions")
+            .select("*, messages(*)")
+            .eq("id", session_id)
+            .order("created_at", foreign_table="messages")
+            .execute()
+        )
         
         if not session_response.data:
             raise HTTPException(
@@ -128,9 +136,6 @@ async def get_session(
                 detail="Access denied"
             )
         
-        # Get messages
-        messages_response = supabase.table("messages").select("*").eq("session_id", session_id).order("created_at").execute()
-        
         messages = [
             MessageSchema(
                 id=msg["id"],
@@ -140,7 +145,7 @@ async def get_session(
                 file_path=msg["file_path"],
                 created_at=msg["created_at"],
             )
-            for msg in messages_response.data
+            for msg in session.get("messages") or []
         ]
         
         return SessionWithMessages(
@@ -2,15 +2,68 @@
 OpenAI LLM Provider for handling message processing and responses.
 """
 
+import asyncio
 import os
 from typing import Optional, List
 from dotenv import load_dotenv
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 load_dotenv()
 
+# Upper bound on concurrent OpenAI requests across all OpenAILLM instances
+MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+# Consecutive successful requests needed before the limit is raised by one
+SUCCESSES_PER_INCREASE = 20
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Retry on rate limits, server errors and connection failures"""
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, APIConnectionError)
+
+
+class _AdaptiveLimiter:
+    """
+    AIMD concurrency limiter: halve the limit on a 429, raise it by one
+    after a run of successful requests.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self._in_flight -= 1
+            if getattr(exc, "status_code", None) == 429:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            elif exc is None:
+                self._successes += 1
+                if self._successes >= SUCCESSES_PER_INCREASE:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+_limiter = _AdaptiveLimiter(MAX_CONCURRENCY)
+
 
 class OpenAILLM:
     """Handler for OpenAI API calls"""
+
+    __slots__ = ("api_key", "model", "_client")
     
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
@@ -19,11 +72,20 @@ class OpenAILLM:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
-        try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=self.api_key)
-        except ImportError:
-            raise ImportError("OpenAI library is not installed. Run: pip install openai")
+        # Created on first use, see client
+        self._client = None
+
+    @property
+    def client(self):
+        """OpenAI client, built on first access so the SDK import is deferred"""
+        if self._client is None:
+            try:
+                from openai import OpenAI
+            except ImportError:
+                raise ImportError("OpenAI library is not installed. Run: pip install openai")
+            # Retries are handled by _create_completion
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
     
     async def process_message(
         self,
@@ -37,7 +99,6 @@ class OpenAILLM:
         Args:
             user_message: The user's input message
             session_context: Optional context for the translation/task
-            session_main_file_path: Optional path to the main file being processed
             conversation_history: Optional list of previous messages for context
         
         Returns:
@@ -57,12 +118,7 @@ class OpenAILLM:
             )
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000,
-            )
+            response = await self._create_completion(messages)
             
             # Extract response text
             agent_response = response.choices[0].message.content
@@ -73,6 +129,27 @@ class OpenAILLM:
             # Return error message instead of raising
             return f"Error processing message with LLM: {str(e)}"
     
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_random_exponential(min=1, max=30),
+        stop=stop_after_attempt(6),
+        reraise=True,
+    )
+    async def _create_completion(self, messages: List[dict]):
+        """
+        Call the chat completions API, retrying transient failures with
+        jittered exponential backoff under the shared concurrency limit.
+        """
+        async with _limiter:
+            # The SDK call is blocking; run it in a worker thread so the event loop keeps serving
+            return await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=2000,
+            )
+    
     def _build_system_prompt(
         self,
         session_context: Optional[str] = None,
@@ -82,7 +159,6 @@ class OpenAILLM:
         
         Args:
             session_context: Optional context for the task
-            session_main_file_path: Optional path to the main file
         
         Returns:
             The system prompt string
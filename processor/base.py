@@ -5,6 +5,9 @@ from typing import Any, Dict, List, Optional
 class BaseDocumentProcessor(ABC):
     """Base class for document processors"""
 
+    # Processors are stateless; no per-instance __dict__
+    __slots__ = ()
+
     @abstractmethod
     def extract_text(self, file_path: str) -> Dict[str, Any]:
         pass
@@ -1,12 +1,14 @@
 import zipfile
 from lxml import etree
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import re
-import shutil
+import tempfile
 
-EXTRACT_DIR = "tmp"
+from .xml_parser import get_parser
+
+DOCUMENT_PART = "word/document.xml"
 
 NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
 
@@ -35,59 +37,91 @@ def unzip(xlsx_path: Path, extract_dir: Path) -> None:
         z.extractall(extract_dir)    
 
 
+def _lookup(content: Dict[str, Any], path: Tuple[Any, ...]):
+    """
+    Follow an index path such as ("tables", 0, 2, 0, 1) into extracted content,
+    returning None if any index is out of range.
+    """
+    node = content.get(path[0], [])
+    for idx in path[1:]:
+        if idx >= len(node):
+            return None
+        node = node[idx]
+    return node
+
 
 
 
 class DOCXProcessor():
     """Processor for XLSX documents"""
 
+    # Compiled once and shared by every document
+    _XP_BODY = etree.XPath("/w:document/w:body", namespaces=NS)
+    _XP_ROWS = etree.XPath("./w:tr", namespaces=NS)
+    _XP_CELLS = etree.XPath("./w:tc", namespaces=NS)
+    _XP_PS = etree.XPath("./w:p", namespaces=NS)
+    _XP_RUNS = etree.XPath("./w:r", namespaces=NS)
+    _XP_T = etree.XPath("./w:t", namespaces=NS)
+
     def extract_text( self, file_path: str) -> List[Dict[str, Any]]:
         
-        unzip(Path(file_path), Path(EXTRACT_DIR))
-        
-
-        document = etree.parse(Path(EXTRACT_DIR) / "word" / "document.xml")
+        # Only document.xml is read, so it is parsed straight from the archive
+        with zipfile.ZipFile(file_path, "r") as z:
+            document = etree.parse(z.open(DOCUMENT_PART), get_parser())
         root = document.getroot()
-        
+        body = self._XP_BODY(root)[0]
+
+        content, _ = self._scan(body)
+        return content
+
+    def _scan(self, body) -> Tuple[Dict[str, Any], List[Tuple[Tuple[Any, ...], Any]]]:
+        """
+        Walk the document body once, returning the extracted content along with
+        every text-bearing <w:t> node and its index path into that content.
+        """
         paragraphs = []
         tables = []
-
-        body = root.find("w:body", NS)
+        run_refs = []
 
         for child in body:
             tag = child.tag
 
             # Normal paragraph 
             if tag == f"{{{NS['w']}}}p":
-                texts = []
-                for r in child.findall("w:r", NS):
-                    t = r.find("w:t", NS)
-                    if t is not None and t.text:
-                        texts.append(t.text)
+                texts = self._scan_paragraph(child, ("paragraphs", len(paragraphs)), run_refs)
                 if texts:
                     paragraphs.append(texts)
 
             # Table
             elif tag == f"{{{NS['w']}}}tbl":
                 table = []
-                for tr in child.findall("w:tr", NS):
-                    for tc in tr.findall("w:tc", NS):
+                for tr in self._XP_ROWS(child):
+                    for tc in self._XP_CELLS(tr):
                         cell_texts = []
-                        for p in tc.findall("w:p", NS):
-                            paras = []
-                            for r in p.findall("w:r", NS):
-                                t = r.find("w:t", NS)
-                                if t is not None and t.text:
-                                    paras.append(t.text)
+                        for p in self._XP_PS(tc):
+                            path = ("tables", len(tables), len(table), len(cell_texts))
+                            paras = self._scan_paragraph(p, path, run_refs)
                             if paras:
                                 cell_texts.append(paras)    
                         table.append(cell_texts) 
                 tables.append(table)
 
-        return {
+        content = {
             "paragraphs": paragraphs,
             "tables": tables
         }
+        return content, run_refs
+
+    def _scan_paragraph(self, paragraph, path: Tuple[Any, ...], run_refs: List) -> List[str]:
+        """Collect the run texts of a paragraph, recording each <w:t> node under path"""
+        texts = []
+        for r in self._XP_RUNS(paragraph):
+            t_nodes = self._XP_T(r)
+            t = t_nodes[0] if t_nodes else None
+            if t is not None and t.text:
+                run_refs.append((path + (len(texts),), t))
+                texts.append(t.text)
+        return texts
     
 
 
@@ -160,89 +194,23 @@ class DOCXProcessor():
         Rebuild the DOCX document with modified content.
         """
         
-        extract_dir = Path(EXTRACT_DIR)
-        unzip(Path(original_path), extract_dir)
-        document_path = extract_dir / "word" / "document.xml"
-        document = etree.parse(document_path)
-        root = document.getroot()
-        body = root.find("w:body", NS)
-
-        paragraphs = translated_content.get("paragraphs", [])
-        tables = translated_content.get("tables", [])
-        p_counter = 0
-        t_counter = 0
-        
-        for child in body:
-            tag = child.tag
-
-            # Normal paragraph 
-            if tag == f"{{{NS['w']}}}p":
-                # Extract texts from this paragraph like we do in extract_text
-                texts = []
-                for r in child.findall("w:r", NS):
-                    t = r.find("w:t", NS)
-                    if t is not None and t.text:
-                        texts.append(t.text)
-                
-                # Only update if this paragraph had text content (matching extraction logic)
-                if texts and p_counter < len(paragraphs):
-                    # Now replace the texts in this paragraph
-                    r_counter = 0
-                    for r in child.findall("w:r", NS):
-                        t = r.find("w:t", NS)
-                        if t is not None and t.text:
-                            # Replace with translated text
-                            if r_counter < len(paragraphs[p_counter]):
-                                t.text = paragraphs[p_counter][r_counter]
-                            r_counter += 1
-                    p_counter += 1
-
-            # Table
-            elif tag == f"{{{NS['w']}}}tbl":
-                cell_counter = 0
-                for tr in child.findall("w:tr", NS):
-                    for tc in tr.findall("w:tc", NS): 
-                        cell_texts = []
-                        para_list = tc.findall("w:p", NS)
-                        
-                        # Extract cell content structure like we do in extract_text
-                        for p in para_list:
-                            paras = []
-                            for r in p.findall("w:r", NS):
-                                t = r.find("w:t", NS)
-                                if t is not None and t.text:
-                                    paras.append(t.text)
-                            if paras:
-                                cell_texts.append(paras)
-                        
-                        # Only update if this cell had text content (matching extraction logic)
-                        if cell_texts and t_counter < len(tables) and cell_counter < len(tables[t_counter]):
-                            # Now replace the texts in this cell
-                            para_counter = 0
-                            for p in para_list:
-                                r_counter = 0
-                                for r in p.findall("w:r", NS):
-                                    t = r.find("w:t", NS)
-                                    if t is not None and t.text:
-                                        # Check bounds before accessing
-                                        if (para_counter < len(tables[t_counter][cell_counter]) and
-                                            r_counter < len(tables[t_counter][cell_counter][para_counter])):
-                                            t.text = tables[t_counter][cell_counter][para_counter][r_counter]
-                                        r_counter += 1
-                                # Only increment if this paragraph had text
-                                paras = []
-                                for r in p.findall("w:r", NS):
-                                    t = r.find("w:t", NS)
-                                    if t is not None and t.text:
-                                        paras.append(t.text)
-                                if paras:
-                                    para_counter += 1
-                        
-                        cell_counter += 1
-                t_counter += 1
-        
-        document.write(document_path, xml_declaration=True, encoding="UTF-8", standalone="yes")
-     
-        recompile(extract_dir, Path(output_path))
-        shutil.rmtree(extract_dir)
+        # A private scratch directory per call, so concurrent jobs never share files
+        with tempfile.TemporaryDirectory(prefix="docx_") as tmp:
+            extract_dir = Path(tmp)
+            unzip(Path(original_path), extract_dir)
+            document_path = extract_dir / DOCUMENT_PART
+            document = etree.parse(document_path, get_parser())
+            root = document.getroot()
+            body = self._XP_BODY(root)[0]
+
+            # Positions match extract_text, so each node maps straight to its translation
+            _, run_refs = self._scan(body)
+            for path, t in run_refs:
+                text = _lookup(translated_content, path)
+                if text is not None:
+                    t.text = text
+
+            document.write(document_path, xml_declaration=True, encoding="UTF-8", standalone="yes")
+
+            recompile(extract_dir, Path(output_path))
         return output_path
\ No newline at end of file
@@ -1,107 +1,271 @@
-import copy
+import io
+import os
+import posixpath
 import re
-import shutil
 from .base import BaseDocumentProcessor
+from .archive import rewrite_archive, serialize
+from .xml_parser import get_parser, iter_elements
 import zipfile
 from lxml import etree
 from pathlib import Path
-from typing import Any, Dict, List
-
-EXTRACT_DIR = "tmp"
-def unzip(path: Path, extract_dir: Path) -> None:
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+# Clark-notation tags, so lookups skip the ElementPath/namespace-map machinery
+A_P = '{http://schemas.openxmlformats.org/drawingml/2006/main}p'
+A_R = '{http://schemas.openxmlformats.org/drawingml/2006/main}r'
+A_T = '{http://schemas.openxmlformats.org/drawingml/2006/main}t'
+P_CM = '{http://schemas.openxmlformats.org/presentationml/2006/main}cm'
+P_TEXT = '{http://schemas.openxmlformats.org/presentationml/2006/main}text'
+P_SLD_ID = '{http://schemas.openxmlformats.org/presentationml/2006/main}sldId'
+R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+# Text classification patterns, compiled once rather than looked up in the re cache per run
+_SYMBOL_ONLY = re.compile(r"[\W_]+")
+_CTRL_CHARS = re.compile(r"[\x00-\x1F\x7F]")
+# Everything float() can accept once stripped; anything else cannot be a number
+_MAYBE_NUMBER = re.compile(r"[\d+\-._e]+|[+\-]?(?:inf|infinity|nan)", re.IGNORECASE)
+_STRIP_IDEOGRAPHIC_SPACE = str.maketrans("", "", "\u3000")
+
+# Translation keys as produced for slides, comments and notes (indices are 1-based),
+# recognised by a single pattern so every key is scanned exactly once
+_TRANSLATION_KEY = re.compile(
+    r"slide ([1-9]\d*) para ([1-9]\d*) run ([1-9]\d*)"
+    r"|(comment|note) slide ([1-9]\d*) text ([1-9]\d*)"
+)
+
+def index_translations(translations: Dict[str, str]):
+    """
+    Split translation keys into slide runs keyed by (slide, para, run) and
+    comment/note texts keyed by (part, text), all as 0-based indices.
+    Keys that match none of the formats are ignored.
+    """
+    slide_map = {}
+    comment_map = {}
+    note_map = {}
+    for key, translation in translations.items():
+        m = _TRANSLATION_KEY.fullmatch(key)
+        if m is None:
+            continue
+        slide_idx, para_idx, run_idx, kind, part_idx, text_idx = m.groups()
+        if kind is None:
+            slide_map[int(slide_idx) - 1, int(para_idx) - 1, int(run_idx) - 1] = translation
+        elif kind == "comment":
+            comment_map[int(part_idx) - 1, int(text_idx) - 1] = translation
+        else:
+            note_map[int(part_idx) - 1, int(text_idx) - 1] = translation
+    return slide_map, comment_map, note_map
+
+# lxml releases the GIL while parsing and serializing, so independent parts
+# can be handled on separate threads
+MAX_WORKERS = os.cpu_count() or 1
+
+def copy_content(content: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy only the lists apply_translations writes into. The text strings are
+    immutable, so they are shared with the original instead of deep-copied.
     """
-    Unzip an XLSX file into extract_dir.
+    return {
+        **content,
+        "slides": [{**slide, "texts": [list(para) for para in slide.get("texts", [])]}
+                   for slide in content.get("slides", [])],
+        "comments": [{**comment, "texts": list(comment.get("texts", []))}
+                     for comment in content.get("comments") or []],
+        "notes": [{**note, "texts": list(note.get("texts", []))}
+                  for note in content.get("notes") or []],
+    }
+
+_DIGITS = re.compile(r"(\d+)")
+
+def natural_key(name: str):
     """
-    extract_dir.mkdir(parents=True, exist_ok=True)
+    Sort key that orders embedded numbers by value, so slide2.xml < slide10.xml.
+    """
+    return [int(part) if i % 2 else part for i, part in enumerate(_DIGITS.split(name))]
 
-    with zipfile.ZipFile(path, "r") as z:
-        z.extractall(extract_dir)    
+def list_parts(part_names, folder: str, prefix: str) -> List[str]:
+    """
+    File names of the XML parts directly inside folder whose name starts with
+    prefix, e.g. slide1.xml, slide2.xml under ppt/slides/, in natural order.
+    """
+    names = []
+    for part in part_names:
+        if part.startswith(folder):
+            name = part[len(folder):]
+            if "/" not in name and name.startswith(prefix) and name.endswith(".xml"):
+                names.append(name)
+    return sorted(names, key=natural_key)
+
+def slide_order(zin: zipfile.ZipFile, part_names) -> List[str]:
+    """
+    Slide file names in the order the presentation shows them, following the
+    sldIdLst of ppt/presentation.xml through its relationships. Slides the
+    list does not mention keep their natural file-name order at the end.
+    """
+    names = list_parts(part_names, "ppt/slides/", "slide")
+    if "ppt/presentation.xml" not in part_names or "ppt/_rels/presentation.xml.rels" not in part_names:
+        return names
+
+    rels = etree.fromstring(zin.read("ppt/_rels/presentation.xml.rels"), get_parser())
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(PKG_REL)}
+
+    remaining = set(names)
+    ordered = []
+    presentation = etree.fromstring(zin.read("ppt/presentation.xml"), get_parser())
+    for sld_id in presentation.iter(P_SLD_ID):
+        target = targets.get(sld_id.get(R_ID))
+        if not target:
+            continue
+        # Targets are relative to ppt/ unless they start at the package root
+        if target.startswith("/"):
+            part = target.lstrip("/")
+        else:
+            part = posixpath.normpath(posixpath.join("ppt", target))
+        name = part[len("ppt/slides/"):] if part.startswith("ppt/slides/") else None
+        if name in remaining:
+            remaining.remove(name)
+            ordered.append(name)
+
+    return ordered + [name for name in names if name in remaining]
+
+def iter_text_elems(paragraph):
+    """
+    Yield the <a:t> of every run in a paragraph that carries text.
+    """
+    for run in paragraph.iterfind(A_R):
+        text_elem = run.find(A_T)
+        if text_elem is not None and text_elem.text is not None:
+            yield text_elem
+
+def _run_texts(paragraph) -> List[str]:
+    return [text_elem.text for text_elem in iter_text_elems(paragraph)]
+
+def _parse_slide(name: str, data: bytes) -> Dict[str, Any]:
+    slide_content = {"slide_name": name, "texts": []}
+    for paragraph in iter_elements(io.BytesIO(data), A_P):
+        para_texts = _run_texts(paragraph)
+        if para_texts:
+            slide_content["texts"].append(para_texts)
+    return slide_content
+
+def _parse_comment(name: str, data: bytes) -> Dict[str, Any]:
+    comment_content = {
+        "comment_file": name,
+        "texts": []
+    }
+    for comment in iter_elements(io.BytesIO(data), P_CM):
+        text_elem = comment.find(P_TEXT)
+        if text_elem is not None and text_elem.text is not None:
+            comment_content["texts"].append(text_elem.text)
+    return comment_content
+
+def _parse_notes(name: str, data: bytes) -> Dict[str, Any]:
+    notes_content = {
+        "notes_file": name,
+        "texts": []
+    }
+    for paragraph in iter_elements(io.BytesIO(data), A_P):
+        para_texts = []
+        max_len = 0
+        for text_elem in iter_text_elems(paragraph):
+            text = text_elem.text
+            para_texts.append(text)
+            if len(text) > max_len:
+                max_len = len(text)
+
+        #Note texts could be stored as 1 char in a <r> node if user type it by hand
+        #But if user paste the texts to notes, a <r> node will contain string
+        if para_texts:
+            if max_len == 1: #Case of single character runs
+                notes_content["texts"].append(''.join(para_texts))
+            else:
+                #Or join them all into 1 string
+                notes_content["texts"].append(' '.join(para_texts))
+    return notes_content
+
+# The rewrite helpers return None when the part came out unchanged, so the
+# original entry is copied through as-is instead of being re-serialized
+
+def _rewrite_slide(data: bytes, texts: List[List[str]]) -> Optional[bytes]:
+    root = etree.fromstring(data, get_parser())
+    dirty = False
+    # Runs were extracted in document order, so one flat pass pairs every
+    # <a:t> with its text; zip stops at whichever side runs out first
+    text_elems = chain.from_iterable(map(iter_text_elems, root.iter(A_P)))
+    for text_elem, text in zip(text_elems, chain.from_iterable(texts)):
+        if text_elem.text != text:
+            text_elem.text = text
+            dirty = True
+    return serialize(root) if dirty else None
+
+def _rewrite_comment(data: bytes, texts: List[str]) -> Optional[bytes]:
+    root = etree.fromstring(data, get_parser())
+    dirty = False
+    idx = 0
+    for comment_elem in root.iter(P_CM):
+        text_elem = comment_elem.find(P_TEXT)
+        if text_elem is not None and text_elem.text is not None:
+            if idx < len(texts):
+                if text_elem.text != texts[idx]:
+                    text_elem.text = texts[idx]
+                    dirty = True
+                idx += 1
+    return serialize(root) if dirty else None
+
+def _rewrite_notes(data: bytes, texts: List[str]) -> Optional[bytes]:
+    root = etree.fromstring(data, get_parser())
+    dirty = False
+    idx = 0
+    # Runs are removed below, so take a snapshot rather than iterating live
+    for paragraph in list(root.iter(A_P)):
+        run_elems = paragraph.findall(A_R)
+        if not run_elems:
+            # Skip paragraphs with no runs
+            continue
+
+        if idx < len(texts):
+            run_texts = texts[idx]
+            idx += 1
+
+            first_text_elem = run_elems[0].find(A_T)
+            if first_text_elem is not None and first_text_elem.text != run_texts:
+                first_text_elem.text = run_texts
+                dirty = True
+
+            #Remove all remaining run elements
+            for run_elem in run_elems[1:]:
+                paragraph.remove(run_elem)
+                dirty = True
+    return serialize(root) if dirty else None
 
-def recompile(extracted_dir: Path, output_file: Path):
+class PPTXProcessor(BaseDocumentProcessor):
 
-    with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as z:
-        for file_path in extracted_dir.rglob("*"):
-            if file_path.is_file():
-                # IMPORTANT: keep relative path
-                arcname = file_path.relative_to(extracted_dir)
-                z.write(file_path, arcname) 
 
-NS = {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-      'p': 'http://schemas.openxmlformats.org/presentationml/2006/main'}
+    def extract_text( self, file_path: str) -> Dict[str, Any]:
 
-class PPTXProcessor(BaseDocumentProcessor):
+        # Parts are read straight from the archive; nothing is extracted to disk
+        with zipfile.ZipFile(file_path, "r") as zin:
+            part_names = zin.namelist()
+            slide_names = slide_order(zin, part_names)
+            comment_names = list_parts(part_names, "ppt/comments/", "comment")
+            notes_names = list_parts(part_names, "ppt/notesSlides/", "notesSlide")
 
+            if not any(part.startswith("ppt/slides/") for part in part_names):
+                return []
 
-    def extract_text( self, file_path: str) -> Dict[str, Any]:
+            # Parts are independent; map keeps the sorted order so indices stay stable
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                def parse_all(parse, folder, names):
+                    return list(executor.map(parse, names, [zin.read(folder + name) for name in names]))
 
-        slides = []
-        unzip(Path(file_path), Path(EXTRACT_DIR))
-        slides_dir = Path(EXTRACT_DIR) / "ppt" / "slides"
+                slides = parse_all(_parse_slide, "ppt/slides/", slide_names)
+                # Extract comments
+                comments = parse_all(_parse_comment, "ppt/comments/", comment_names)
+                #Extract slide notes
+                notes = parse_all(_parse_notes, "ppt/notesSlides/", notes_names)
 
-        if not slides_dir.exists():
-            return slides
-        
-        for slide_file in sorted(slides_dir.glob("slide*.xml")):
-            tree = etree.parse(str(slide_file))
-            root = tree.getroot()
-
-            slide_content = {"slide_name": slide_file.name, "texts": []}
-
-            for paragraph in root.findall('.//a:p', NS):
-                para_texts = []
-                for run in paragraph.findall('a:r', NS):
-                    text_elem = run.find('a:t', NS)
-                    if text_elem is not None and text_elem.text is not None:
-                        para_texts.append(text_elem.text)
-                if para_texts:
-                    slide_content["texts"].append(para_texts)
-            slides.append(slide_content)
-
-        # Extract comments
-        comments = []
-        comment_dir = Path(EXTRACT_DIR) / "ppt" / "comments"
-        if comment_dir.exists():
-            for comment_file in sorted(comment_dir.glob("comment*.xml")):
-                comment_content = {
-                    "comment_file": comment_file.name,
-                    "texts": []
-                }
-                comment_tree = etree.parse(str(comment_file))
-                comment_root = comment_tree.getroot()
-                for comment in comment_root.findall('.//p:cm', NS):
-                    text_elem = comment.find('p:text', NS)
-                    if text_elem is not None and text_elem.text is not None:
-                        comment_content["texts"].append(text_elem.text)
-                comments.append(comment_content)
-
-        #Extract slide notes
-        notes = []
-        notes_dir = Path(EXTRACT_DIR) / "ppt" / "notesSlides"
-        if notes_dir.exists():
-            for notes_file in sorted(notes_dir.glob("notesSlide*.xml")):
-                notes_content = {
-                    "notes_file": notes_file.name,
-                    "texts": []
-                }
-                notes_tree = etree.parse(str(notes_file))
-                notes_root = notes_tree.getroot()
-                for paragraph in notes_root.findall('.//a:p', NS):
-                    para_texts = []
-                    for run in paragraph.findall('a:r', NS):
-                        text_elem = run.find('a:t', NS)
-                        if text_elem is not None and text_elem.text is not None:
-                            para_texts.append(text_elem.text)
-
-                    #Note texts could be stored as 1 char in a <r> node if user type it by hand
-                    #But if user paste the texts to notes, a <r> node will contain string
-                    if para_texts:
-                        if all(len(t) == 1 for t in para_texts): #Case of single character runs
-                            para_texts = ''.join(para_texts) 
-                            notes_content["texts"].append(para_texts)
-                        else:
-                            #Or join them all into 1 string
-                            notes_content["texts"].append(' '.join(para_texts))
-                notes.append(notes_content)
         return {
             "slides": slides,
             "comments": comments,
@@ -114,164 +278,88 @@ class PPTXProcessor(BaseDocumentProcessor):
         if not text:
             return False
 
-        # Reject pure numbers (int / float / scientific)
-        try:
-            float(text)
-            return False
-        except ValueError:
-            pass
+        # Reject pure numbers (int / float / scientific). Only strings made of
+        # number characters are handed to float(), so prose never raises
+        if _MAYBE_NUMBER.fullmatch(text):
+            try:
+                float(text)
+                return False
+            except ValueError:
+                pass
 
         # Reject single symbol
         if len(text) == 1 and not text.isalnum():
             return False
 
         # Reject symbol-only strings
-        if re.fullmatch(r"[\W_]+", text):
+        if _SYMBOL_ONLY.fullmatch(text):
             return False
 
         # Accept if contains any letter (Unicode-safe)
-        return any(ch.isalpha() for ch in text)
+        return any(map(str.isalpha, text))
 
 
     def clean_text(self, text: str) -> str:
-        text = text.replace("\u3000", "")
-        return re.sub(r"[\x00-\x1F\x7F]", "", text)
+        text = text.translate(_STRIP_IDEOGRAPHIC_SPACE)
+        return _CTRL_CHARS.sub("", text)
 
     
 
     def apply_translations(self, extracted_content, translations) -> Dict[str, Any]:
-        translated_content = copy.deepcopy(extracted_content)
-        for slide_idx, slide in enumerate(translated_content.get("slides", []), start=1):
-            for para_index, para in enumerate(slide.get("texts", []),start=1):
-                for run_idx, run in enumerate(para, start=1):
-                    cleaned_text = self.clean_text(run)
-                    if self.is_translatable_text(cleaned_text):
-                        key = f"slide {slide_idx} para {para_index} run {run_idx}"
-                        if key in translations:
-                            slide["texts"][para_index - 1][run_idx - 1] = translations[key]
-        
-        if extracted_content.get("comments"):
-            for comment_idx, comment in enumerate(translated_content["comments"],start=1):
-                for idx, text in enumerate(comment.get("texts", []), start=1):
-                    cleaned_text = self.clean_text(text)
-                    if self.is_translatable_text(cleaned_text):
-                        key = f"comment slide {comment_idx} text {idx}"
-                        comment["texts"][idx - 1] = translations[key]
-
-        if extracted_content.get("notes"):
-            for note_idx, note in enumerate(translated_content["notes"],start=1):
-                for idx, text in enumerate(note.get("texts", []), start=1):
-                    cleaned_text = self.clean_text(text)
-                    if self.is_translatable_text(cleaned_text):
-                        key = f"note slide {note_idx} text {idx}"
-                        note["texts"][idx - 1] = translations[key]
+        translated_content = copy_content(extracted_content)
+        slides = translated_content.get("slides", [])
+        comments = translated_content.get("comments") or []
+        notes = translated_content.get("notes") or []
+
+        # Walk the translations rather than every run: each key names its own
+        # slot, and only translatable runs were given keys in the first place
+        slide_map, comment_map, note_map = index_translations(translations)
+
+        for (slide_idx, para_idx, run_idx), translation in slide_map.items():
+            try:
+                slides[slide_idx]["texts"][para_idx][run_idx] = translation
+            except IndexError:
+                # Key refers to a slot this document does not have
+                continue
+
+        for parts, bucket in ((comments, comment_map), (notes, note_map)):
+            for (part_idx, text_idx), translation in bucket.items():
+                try:
+                    parts[part_idx]["texts"][text_idx] = translation
+                except IndexError:
+                    continue
 
         return translated_content
     
     def reconstruct_document(self, original_path, translated_content, output_path, target_lang):
-        unzip(Path(original_path), Path(EXTRACT_DIR))
-        slides_dir = Path(EXTRACT_DIR) / "ppt" / "slides"
-
-        slides = translated_content.get("slides", [])
-        for slide in slides:
-            file_name = slide.get("slide_name")
-            slide_file = slides_dir / file_name
-            flattened_texts = []   
-            for para in slide.get("texts", []):
-                para_texts = []
-                for run in para:
-                    para_texts.append(run)
-                flattened_texts.extend(para_texts)
-
-            if not slide_file.exists():
-                continue
-            tree = etree.parse(str(slide_file))
-            root = tree.getroot()
-
-            idx = 0
-            for paragraph in root.findall('.//a:p', NS):
-                for run in paragraph.findall('a:r', NS):
-                    text_elem = run.find('a:t', NS)
-                    if text_elem is not None and text_elem.text is not None:
-                        if idx < len(flattened_texts):
-                            text_elem.text = flattened_texts[idx]
-                            idx += 1
-        
-            tree.write(
-                str(slide_file),
-                encoding="UTF-8",
-                xml_declaration=True,
-                standalone=True,
-            )       
-
-        if translated_content.get("comments"):
-            comment_dir = Path(EXTRACT_DIR) / "ppt" / "comments"
-            for comment in translated_content["comments"]:
-                file_name = comment.get("comment_file")
-                comment_file = comment_dir / file_name
-                if not comment_file.exists():
-                    continue
-                tree = etree.parse(str(comment_file))
-                root = tree.getroot()
-                texts = comment.get("texts", [])
-                idx = 0
-                for comment_elem in root.findall('.//p:cm', NS):
-                    text_elem = comment_elem.find('p:text', NS)
-                    if text_elem is not None and text_elem.text is not None:
-                        if idx < len(texts):
-                            text_elem.text = texts[idx]
-                            idx += 1
-                tree.write(
-                    str(comment_file),
-                    encoding="UTF-8",
-                    xml_declaration=True,
-                    standalone=True,
-                )
-        
-        if translated_content.get("notes"):
-            notes_dir = Path(EXTRACT_DIR) / "ppt" / "notesSlides"
-            for note in translated_content["notes"]:
-                file_name = note.get("notes_file")
-                notes_file = notes_dir / file_name
-                if not notes_file.exists():
-                    continue
-                tree = etree.parse(str(notes_file))
-                root = tree.getroot()
-                texts = note.get("texts", [])
-
-                idx = 0
-                for paragraph in root.findall('.//a:p', NS):
-                    run_elems = paragraph.findall('a:r', NS)
-                    if not run_elems:
-                        # Skip paragraphs with no runs
-                        continue
-                    
-           
-                    if idx < len(texts):
-                        run_texts = texts[idx]
-                        idx += 1
-                        
-                        first_run_elem = run_elems[0] 
-                        first_text_elem = first_run_elem.find('a:t', NS)
-                        if first_text_elem is not None:
-                            first_text_elem.text = run_texts
-
-                        #Remove all remaining run elements
-                        for run_elem in run_elems[1:]:
-                            paragraph.remove(run_elem)
-
-                tree.write(
-                    str(notes_file),
-                    encoding="UTF-8",
-                    xml_declaration=True,
-                    standalone=True,
-                )
+        # Parts are read from the original archive and rewritten in memory, so
+        # the package is never extracted to disk a second time. Parsing,
+        # patching and serializing each part is independent work for the pool.
+        pending = {}
+        with zipfile.ZipFile(original_path, "r") as zin, \
+                ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            part_names = set(zin.namelist())
+
+            def submit(part, rewrite, texts):
+                if part in part_names:
+                    pending[part] = executor.submit(rewrite, zin.read(part), texts)
+
+            for slide in translated_content.get("slides", []):
+                submit(f"ppt/slides/{slide.get('slide_name')}", _rewrite_slide, slide.get("texts", []))
+
+            for comment in translated_content.get("comments") or []:
+                submit(f"ppt/comments/{comment.get('comment_file')}", _rewrite_comment, comment.get("texts", []))
+
+            for note in translated_content.get("notes") or []:
+                submit(f"ppt/notesSlides/{note.get('notes_file')}", _rewrite_notes, note.get("texts", []))
+
+        modified = {}
+        for part, future in pending.items():
+            data = future.result()
+            if data is not None:
+                modified[part] = data
         
-        recompile(Path(EXTRACT_DIR), Path(output_path))
-        try:
-            shutil.rmtree(EXTRACT_DIR)
-        except Exception as e:
-            print("Failed to remove temporary directory with error ", str(e) )
+        rewrite_archive(Path(original_path), Path(output_path), modified)
 
         return output_path
 
@@ -1,14 +1,15 @@
 import re
-import shutil
+import posixpath
 from .base import BaseDocumentProcessor
+from .archive import rewrite_archive, serialize
+from .xml_parser import get_parser, get_read_parser, iter_elements
 
 import copy
 from typing import Any, Dict, List, Tuple
 from pathlib import Path
 
 import zipfile
-import tempfile
-from pathlib import Path
+from array import array
 from lxml import etree
 
 
@@ -20,246 +21,295 @@ DRAWING_NS = {
     "xdr": "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing",
     "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
 }
-EXTRACT_DIR = "tmp"
 
-CELL_RE = re.compile(r"^([A-Z]+)([0-9]+)$")
+# Package parts edited during reconstruction
+SHARED_STRINGS_PART = "xl/sharedStrings.xml"
+WORKBOOK_PART = "xl/workbook.xml"
+WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+DRAWINGS_DIR = "xl/drawings/"
+WORKSHEET_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+
+# Queries compiled once and reused for every sheet and drawing
+XP_SHEETS = etree.XPath(".//a:sheets/a:sheet", namespaces=NS)
+XP_RELS = etree.XPath("r:Relationship", namespaces=REL_NS)
+XP_SI_T = etree.XPath("./a:t", namespaces=SHEET_NS)
+XP_SI_RUN_T = etree.XPath("./a:r/a:t", namespaces=SHEET_NS)
+XP_SI_ALL_T = etree.XPath(".//a:t", namespaces=SHEET_NS)
+XP_SP = etree.XPath(".//xdr:sp", namespaces=DRAWING_NS)
+XP_P = etree.XPath(".//a:p", namespaces=DRAWING_NS)
+XP_AT = etree.XPath("a:t", namespaces=DRAWING_NS)
+
+# Clark-notation tags for the streamed worksheet and shared-string parts
+ROW_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}row"
+C_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}c"
+V_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v"
+SI_TAG = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}si"
+SP_TAG = "{http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing}sp"
+
+# Drawing text lives in the DrawingML main namespace, not the spreadsheetDrawing one
+A_R = "{http://schemas.openxmlformats.org/drawingml/2006/main}r"
+A_FLD = "{http://schemas.openxmlformats.org/drawingml/2006/main}fld"
+A_BR = "{http://schemas.openxmlformats.org/drawingml/2006/main}br"
+A_T = "{http://schemas.openxmlformats.org/drawingml/2006/main}t"
+# Children of a drawing paragraph that carry text
+RUN_TAGS = frozenset((A_R, A_FLD))
 
 def parse_cell_ref(cell_ref: str) -> Tuple[int, str]:
     """
-    Parse Excel cell reference like 'AH39' into ('AH', 39)
+    Parse Excel cell reference like 'AH39' into (39, 'AH')
     """
-    m = CELL_RE.match(cell_ref)
-    if not m:
+    # Split off the trailing row digits in C, then validate the column letters
+    col = cell_ref.rstrip("0123456789")
+    row = cell_ref[len(col):]
+    if not row or not col.isascii() or not col.isalpha() or not col.isupper():
         raise ValueError(f"Invalid cell reference: {cell_ref}")
 
-    col_letters, row = m.groups()
-    return int(row), col_letters
-
-def recompile(extracted_dir: Path, output_xlsx: Path):
+    return int(row), col
+
+_SYMBOL_ONLY_RE = re.compile(r"[\W_]+")
+# Control characters and the ideographic space, dropped in a single pass
+_CLEAN_RE = re.compile("[\x00-\x1F\x7F\u3000]")
+
+# Deliberately not cached at module level: that would keep user document text
+# alive across requests. Repeats within a workbook are deduplicated per call
+# by the cell_texts dict in extract_text.
+def _is_translatable(text: str) -> bool:
+    if not text:
+        return False
+    text = text.strip()
+    if not text:
+        return False
+
+    # Reject single symbol; cheapest check, so it runs before float()
+    if len(text) == 1 and not text.isalnum():
+        return False
+
+    # Reject pure numbers (int / float / scientific)
+    try:
+        float(text)
+        return False
+    except ValueError:
+        pass
+
+    # Reject symbol-only strings
+    if _SYMBOL_ONLY_RE.fullmatch(text):
+        return False
+
+    # Accept if contains any letter (Unicode-safe)
+    return any(ch.isalpha() for ch in text)
+
+def drawing_names(part_names) -> List[str]:
     """
-    Rebuild an XLSX file from an extracted directory.
+    Sorted file names of the drawing parts directly under xl/drawings/.
     """
-
-    with zipfile.ZipFile(output_xlsx, "w", zipfile.ZIP_DEFLATED) as z:
-        for file_path in extracted_dir.rglob("*"):
-            if file_path.is_file():
-                # IMPORTANT: keep relative path
-                arcname = file_path.relative_to(extracted_dir)
-                z.write(file_path, arcname) 
-                
-                
-
-def unzip(xlsx_path: Path, extract_dir: Path) -> None:
+    names = []
+    for part in part_names:
+        if part.startswith(DRAWINGS_DIR):
+            name = part[len(DRAWINGS_DIR):]
+            if "/" not in name and name.startswith("drawing") and name.endswith(".xml"):
+                names.append(name)
+    return sorted(names)
+
+def resolve_target(target: str) -> str:
     """
-    Unzip an XLSX file into extract_dir.
+    Turn a relationship target of xl/workbook.xml into a package part name.
     """
-    extract_dir.mkdir(parents=True, exist_ok=True)
-
-    with zipfile.ZipFile(xlsx_path, "r") as z:
-        z.extractall(extract_dir)    
-
-def build_shared_strings(shared_strings_path: Path) -> List[List[str]]:
-        
+    # Targets are relative to xl/ unless they start at the package root
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
 
-        if not shared_strings_path.exists():
-            return []
+def build_shared_strings(zin: zipfile.ZipFile, part_names) -> Tuple[array, List[str]]:
+        """
+        Read the shared string table as two flat arrays: every text in table
+        order, and offsets such that entry i is flat[offsets[i]:offsets[i + 1]].
+        """
 
-        tree = etree.parse(shared_strings_path)
-        root = tree.getroot()
+        offsets = array("q", [0])
+        flat: List[str] = []
 
-        shared_strings: List[List[str]] = []
+        if SHARED_STRINGS_PART not in part_names:
+            return offsets, flat
 
         # Already exclude phonetic strings <si><rPh>
 
-        for si in root.findall("a:si", SHEET_NS):
-            texts: List[str] = []
-            
-            # Case 1: simple shared string <si><t>
-            for t in si.findall("./a:t", SHEET_NS):
-                if t.text:
-                    texts.append(t.text)
+        with zin.open(SHARED_STRINGS_PART) as source:
+            for si in iter_elements(source, SI_TAG):
+                # Case 1: simple shared string <si><t>
+                for t in XP_SI_T(si):
+                    if t.text:
+                        flat.append(t.text)
 
-            # Case 2: rich text runs <si><r><t>
-            for t in si.findall("./a:r/a:t", SHEET_NS):
-                if t.text:
-                    texts.append(t.text)
+                # Case 2: rich text runs <si><r><t>
+                for t in XP_SI_RUN_T(si):
+                    if t.text:
+                        flat.append(t.text)
 
-            shared_strings.append(texts) #List of list of strings
+                offsets.append(len(flat))
 
-        return shared_strings 
+        return offsets, flat
 
-def extract_drawings(extract_dir: Path) -> list[Dict[str, Any]]:
+def extract_drawings(zin: zipfile.ZipFile, part_names) -> list[Dict[str, Any]]:
+    """
+    Collect the text of every drawing part as flat arrays: all runs in
+    document order ("\\n" for a line break), paragraph p spanning
+    runs[para_offsets[p]:para_offsets[p + 1]] and shape s spanning
+    paragraphs shape_offsets[s] to shape_offsets[s + 1].
+    """
     drawings = []
 
-    drawings_dir = extract_dir / "xl" / "drawings"
-    if not drawings_dir.exists():
-        return drawings
-
-    for drawing_file in sorted(drawings_dir.glob("drawing*.xml")):
-        tree = etree.parse(drawing_file)
-        root = tree.getroot()
-
-        # twoCellAnchor + oneCellAnchor together
-        for anchor in root.findall(".//xdr:twoCellAnchor", DRAWING_NS):
-            for sp in anchor.findall(".//xdr:sp", DRAWING_NS):
-                paragraphs: List[List[str]] = []
-
-                for p in sp.findall(".//a:p", DRAWING_NS):
-                    runs: List[str] = []
-
+    for fname in drawing_names(part_names):
+        runs: List[str] = []
+        para_offsets = [0]
+        shape_offsets = [0]
+
+        # Shapes in document order, whatever anchor (two-cell, one-cell,
+        # absolute, or a group inside one) holds them. Shapes never nest,
+        # so each one is streamed and dropped once its text has been read.
+        with zin.open(DRAWINGS_DIR + fname) as source:
+            for sp in iter_elements(source, SP_TAG):
+                for p in XP_P(sp):
                     # IMPORTANT: iterate children to preserve order
                     for node in p:
-                        local = etree.QName(node).localname
+                        tag = node.tag
 
-                        if local in ("r", "fld"):
-                            t = node.find("a:t", DRAWING_NS)
-                            if t is not None and t.text is not None:
-                                runs.append(t.text)
+                        if tag in RUN_TAGS:
+                            t_nodes = XP_AT(node)
+                            if t_nodes and t_nodes[0].text is not None:
+                                runs.append(t_nodes[0].text)
 
-                        elif local == "br":
+                        elif tag == A_BR:
                             runs.append("\n")
 
-                    if runs:
-                        paragraphs.append(runs)
+                    # Paragraphs (and shapes) without text get no entry
+                    if len(runs) > para_offsets[-1]:
+                        para_offsets.append(len(runs))
 
-                if paragraphs:
-                    drawings.append({
-                        "drawing_file": drawing_file.name,
-                        "paragraphs": paragraphs,
-                    })
+                if len(para_offsets) - 1 > shape_offsets[-1]:
+                    shape_offsets.append(len(para_offsets) - 1)
 
-        for anchor in root.findall(".//xdr:oneCellAnchor", DRAWING_NS):
-            for sp in anchor.findall(".//xdr:sp", DRAWING_NS):
-                paragraphs: List[List[str]] = []
-
-                for p in sp.findall(".//a:p", DRAWING_NS):
-                    runs: List[str] = []
-
-                    # IMPORTANT: iterate children to preserve order
-                    for node in p:
-                        local = etree.QName(node).localname
-
-                        if local in ("r", "fld"):
-                            t = node.find("a:t", DRAWING_NS)
-                            if t is not None and t.text is not None:
-                                runs.append(t.text)
-
-                        elif local == "br":
-                            runs.append("\n")
-
-                    if runs:
-                        paragraphs.append(runs)
-
-                if paragraphs:
-                    drawings.append({
-                        "drawing_file": drawing_file.name,
-                        "paragraphs": paragraphs,
-                    })
+        if runs:
+            drawings.append({
+                "drawing_file": fname,
+                "runs": runs,
+                "para_offsets": para_offsets,
+                "shape_offsets": shape_offsets,
+            })
 
     return drawings
 
+def rewrite_drawing(root, runs: List[str]) -> None:
+    """
+    Write translated runs back into a drawing part. The walk visits text
+    slots in exactly the order extract_drawings collected them, so slot k
+    simply takes runs[k]; line breaks hold a slot but are left alone.
+    """
+    slot = 0
+    n_runs = len(runs)
+    for sp in XP_SP(root):
+        for p in XP_P(sp):
+            for node in p:
+                tag = node.tag
+                if tag in RUN_TAGS:
+                    t = node.find(A_T)
+                    if t is None or t.text is None:
+                        continue
+                    if slot < n_runs:
+                        t.text = runs[slot]
+                elif tag != A_BR:
+                    continue
+                slot += 1
+
 class XLSXProcessor(BaseDocumentProcessor):
     """Processor for XLSX documents"""
 
+    __slots__ = ()
+
     def extract_text( self, file_path: str) -> Dict[str, Any]:
         # content = {"worksheets": []}
-        
-        unzip(Path(file_path), Path(EXTRACT_DIR))
-        
 
-        #Extract sheet information
-        workbook = etree.parse(Path(EXTRACT_DIR) / "xl" / "workbook.xml")
-        root = workbook.getroot()
-
-        sheets = []
-        for sheet in root.findall(".//a:sheets/a:sheet", NS):
-            sheets.append({
-                "name": sheet.get("name"),
-                "sheetId": sheet.get("sheetId"),
-                "rId": sheet.get("{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"),
-            })
-        # print(sheets)
-
-        # Map sheet rId to actual sheet file paths
-        relationships = etree.parse(Path(EXTRACT_DIR) / "xl" / "_rels" / "workbook.xml.rels")
-        root = relationships.getroot()
-        for sheet in sheets:
-            for rel in relationships.findall("r:Relationship", REL_NS):
-                if rel.get("Id") == sheet.get("rId") and rel.get("Type") == "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet":
-                    sheet["sheet_path"] = rel.get("Target")
-
-        shared_strings = build_shared_strings(Path(EXTRACT_DIR) / "xl" / "sharedStrings.xml")
-        # print("Shared Strings:", len(shared_strings))
-        # print(shared_strings[166])
-
-        #Map each row of each sheet to its shared string values
-        for sheet in sheets:
-            sheet_file_path = Path(EXTRACT_DIR) / "xl" / sheet["sheet_path"]
-            worksheet = etree.parse(sheet_file_path)
-            root = worksheet.getroot()
-
-            data = []
-            for row in root.findall(".//a:sheetData/a:row", NS):
-                for c in row.findall("a:c", NS):
-                    cell_type = c.get("t")
-                    v = c.find("a:v", NS)
-                    if v is not None and v.text is not None and cell_type == "s":
-                        sst_index = int(v.text)
-                        cell_value = {
-                            "cell": c.get("r"),
-                            "text": shared_strings[sst_index], #text here is a list of strings (for handling rich text)
-                            "sst_index": sst_index                               
-                        }
-                    else:
-                        cell_value = ""
-                    if cell_value:
-                        data.append(cell_value)
-
-            sheet["data"] = data
+        # Parts are read straight from the archive; nothing is unpacked to disk
+        with zipfile.ZipFile(file_path, "r") as zin:
+            part_names = set(zin.namelist())
+
+            #Extract sheet information
+            workbook = etree.parse(zin.open(WORKBOOK_PART), get_read_parser())
+            root = workbook.getroot()
+
+            sheets = []
+            for sheet in XP_SHEETS(root):
+                sheets.append({
+                    "name": sheet.get("name"),
+                    "sheetId": sheet.get("sheetId"),
+                    "rId": sheet.get("{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"),
+                })
+            # print(sheets)
+
+            # Map sheet rId to actual sheet file paths
+            relationships = etree.parse(zin.open(WORKBOOK_RELS_PART), get_read_parser())
+            root = relationships.getroot()
+            worksheet_targets = {
+                rel.get("Id"): rel.get("Target")
+                for rel in XP_RELS(root)
+                if rel.get("Type") == WORKSHEET_REL_TYPE
+            }
+            for sheet in sheets:
+                if sheet.get("rId") in worksheet_targets:
+                    sheet["sheet_path"] = worksheet_targets[sheet["rId"]]
+
+            offsets, flat_strings = build_shared_strings(zin, part_names)
+            # Texts of the shared strings actually referenced, built once per index and shared by its cells
+            cell_texts: Dict[int, Tuple[str, ...]] = {}
+
+            #Map each row of each sheet to its shared string values
+            for sheet in sheets:
+                data = []
+                with zin.open(resolve_target(sheet["sheet_path"])) as source:
+                    for row in iter_elements(source, ROW_TAG):
+                        for c in row.iterfind(C_TAG):
+                            # Only shared-string cells carry translatable text
+                            if c.get("t") != "s":
+                                continue
+                            v = c.find(V_TAG)
+                            if v is not None and v.text is not None:
+                                sst_index = int(v.text)
+                                texts = cell_texts.get(sst_index)
+                                if texts is None:
+                                    texts = tuple(flat_strings[offsets[sst_index]:offsets[sst_index + 1]])
+                                    # Blank strings can never be translated; cache them as () so
+                                    # repeated blank cells skip the check
+                                    if not any(text.strip() for text in texts):
+                                        texts = ()
+                                    cell_texts[sst_index] = texts
+                                if not texts:
+                                    continue
+                                data.append({
+                                    "cell": c.get("r"),
+                                    "text": texts, #text here is a tuple of strings (for handling rich text)
+                                    "sst_index": sst_index
+                                })
+
+                sheet["data"] = data
         
 
-        return {
-            "sheets": sheets,
-            "drawings": extract_drawings(Path(EXTRACT_DIR)),
-        }
+            return {
+                "sheets": sheets,
+                "drawings": extract_drawings(zin, part_names),
+            }
     
     def clean_text(self, text: str) -> str:
-        text = text.replace("\u3000", "")
-        return re.sub(r"[\x00-\x1F\x7F]", "", text)
+        # Everything _CLEAN_RE strips is non-printable, so most cells skip the regex
+        if text.isprintable():
+            return text
+        return _CLEAN_RE.sub("", text)
 
     def is_translatable_text(self, text: str) -> bool:
-        text = text.strip()
-        if not text:
-            return False
-
-        # Reject pure numbers (int / float / scientific)
-        try:
-            float(text)
-            return False
-        except ValueError:
-            pass
-
-        # Reject single symbol
-        if len(text) == 1 and not text.isalnum():
-            return False
-
-        # Reject symbol-only strings
-        if re.fullmatch(r"[\W_]+", text):
-            return False
-
-        # Accept if contains any letter (Unicode-safe)
-        return any(ch.isalpha() for ch in text)
+        return _is_translatable(text)
 
     def reconstruct_document(
         self, original_path: str, translated_content: Dict[str, Any], output_path: str, target_lang: str
     ) -> str:
         """Reconstruct XLSX by updating sharedStrings, sheet names, and drawings."""
-        extract_dir = Path(EXTRACT_DIR)
-        unzip_xlsx(Path(original_path), extract_dir)
-
-        shared_string_path = extract_dir / "xl" / "sharedStrings.xml"
-        workbook_path = extract_dir / "xl" / "workbook.xml"
-
         # Build mapping from shared string index -> translated text
         index_to_translation: Dict[int, List[str]] = {}
         sheet_name_map: Dict[int, str] = {}
@@ -275,6 +325,11 @@ class XLSXProcessor(BaseDocumentProcessor):
                 except Exception:
                     continue
 
+                # Every cell sharing a string carries the same text, so only
+                # the first occurrence needs flattening
+                if idx in index_to_translation:
+                    continue
+
                 textual = data.get("text", [])
                 # Flatten to list of strings
                 flattened: List[str] = []
@@ -289,188 +344,64 @@ class XLSXProcessor(BaseDocumentProcessor):
 
                 index_to_translation[idx] = flattened
 
-        # Update sharedStrings.xml
-        if shared_string_path.exists():
-            tree = etree.parse(str(shared_string_path))
-            root = tree.getroot()
-            si_nodes = root.findall("a:si", SHEET_NS)
+        # Only the parts that change are parsed and re-serialized; every other
+        # entry is copied from the original archive as-is
+        modified: Dict[str, bytes] = {}
+        with zipfile.ZipFile(original_path, "r") as zin:
+            part_names = set(zin.namelist())
 
-            for idx, si in enumerate(si_nodes):
-                if idx not in index_to_translation:
-                    continue
+            # Update sharedStrings.xml, unless no cell was translated
+            if index_to_translation and SHARED_STRINGS_PART in part_names:
+                tree = etree.parse(zin.open(SHARED_STRINGS_PART), get_parser())
+                root = tree.getroot()
+                # Jump straight to the translated entries instead of walking
+                # the whole table; the <si> list itself is gathered in C
+                si_nodes = root.findall(SI_TAG)
+                for idx, new_texts in index_to_translation.items():
+                    if not 0 <= idx < len(si_nodes):
+                        continue
+                    t_nodes = XP_SI_ALL_T(si_nodes[idx])
+
+                    # Assign to existing <t> nodes in order
+                    for i, t_node in enumerate(t_nodes):
+                        if i < len(new_texts):
+                            t_node.text = new_texts[i]
+                        else:
+                            t_node.text = ""
+
+                modified[SHARED_STRINGS_PART] = serialize(tree)
+
+            # Update workbook sheet names
+            if any(sheet_name_map.values()) and WORKBOOK_PART in part_names:
+                workbook_tree = etree.parse(zin.open(WORKBOOK_PART), get_parser())
+                workbook_root = workbook_tree.getroot()
+                workbook_sheets = XP_SHEETS(workbook_root)
+
+                for sheet_idx, sheet_elem in enumerate(workbook_sheets, start=1):
+                    if sheet_idx in sheet_name_map and sheet_name_map[sheet_idx]:
+                        sheet_elem.set("name", sheet_name_map[sheet_idx])
 
-                new_texts = index_to_translation[idx]
-                t_nodes = si.findall(".//a:t", SHEET_NS)
-
-                # Assign to existing <t> nodes in order
-                for i, t_node in enumerate(t_nodes):
-                    if i < len(new_texts):
-                        t_node.text = new_texts[i]
-                    else:
-                        t_node.text = ""
-
-            tree.write(
-                str(shared_string_path),
-                encoding="UTF-8",
-                xml_declaration=True,
-                standalone=True,
-            )
-
-        # Update workbook sheet names
-        if workbook_path.exists():
-            workbook_tree = etree.parse(str(workbook_path))
-            workbook_root = workbook_tree.getroot()
-            workbook_sheets = workbook_root.findall(".//a:sheets/a:sheet", NS)
-
-            for sheet_idx, sheet_elem in enumerate(workbook_sheets, start=1):
-                if sheet_idx in sheet_name_map and sheet_name_map[sheet_idx]:
-                    sheet_elem.set("name", sheet_name_map[sheet_idx])
-
-            workbook_tree.write(
-                str(workbook_path),
-                encoding="UTF-8",
-                xml_declaration=True,
-                standalone=True,
-            )
-
-        # Reconstruct drawings -> parsing the drawing files the same way as extract_drawings to map the texts back correctly
-        drawings_dir = extract_dir / "xl" / "drawings"
-        if drawings_dir.exists():
-            # Group translations by drawing filename
-            drawings_by_file: Dict[str, List[Dict[str, Any]]] = {}
+                modified[WORKBOOK_PART] = serialize(workbook_tree)
+
+            # Reconstruct drawings -> walking the drawing files the same way as extract_drawings to map the texts back correctly
+            runs_by_file: Dict[str, List[str]] = {}
             for d in translated_content.get("drawings", []):
                 fname = d.get("drawing_file")
-                if not fname:
-                    continue
-                drawings_by_file.setdefault(fname, []).append(d)
-
-            for drawing_file in sorted(drawings_dir.glob("drawing*.xml")):
-                fname = drawing_file.name
-                entries = drawings_by_file.get(fname, [])
-                if not entries:
-                    continue
+                if fname and d.get("runs"):
+                    runs_by_file.setdefault(fname, d["runs"])
 
-                tree = etree.parse(str(drawing_file))
-                root = tree.getroot()
+            if runs_by_file:
+                for fname in drawing_names(part_names):
+                    runs = runs_by_file.get(fname)
+                    if not runs:
+                        continue
 
-                entry_idx = 0
-
-          
-                for anchor in root.findall(".//xdr:twoCellAnchor", DRAWING_NS):
-                    for sp in anchor.findall(".//xdr:sp", DRAWING_NS):
-                        p_nodes = sp.findall(".//a:p", DRAWING_NS)
-                        if not p_nodes:
-                            continue
-
-                        has_content = False
-                        for p in p_nodes:
-                            for node in p:
-                                local = etree.QName(node).localname
-                                if local in ("r", "fld"):
-                                    t = node.find('{%s}t' % DRAWING_NS['a'])
-                                    if t is not None and t.text is not None:
-                                        has_content = True
-                                        break
-                                elif local == "br":
-                                    has_content = True
-                                    break
-                            if has_content:
-                                break
-
-                        if not has_content:
-                            continue
-
-                        if entry_idx >= len(entries):
-                            break
-
-                        entry = entries[entry_idx]
-                        para_trans_list = entry.get("paragraphs", [])
-
-                        for p_idx, p_node in enumerate(p_nodes):
-                            if p_idx >= len(para_trans_list):
-                                break
-
-                            trans_para = para_trans_list[p_idx]
-                            run_idx = 0
-
-                       
-                            for node in p_node:
-                                local = etree.QName(node).localname
-
-                                if local in ("r", "fld"):
-                                    if run_idx < len(trans_para):
-                                        t = node.find('{%s}t' % DRAWING_NS['a'])
-                                        if t is not None:
-                                            t.text = trans_para[run_idx]
-                                    run_idx += 1
-                                elif local == "br":
-                                    run_idx += 1
-
-                        entry_idx += 1
-
-            
-                for anchor in root.findall(".//xdr:oneCellAnchor", DRAWING_NS):
-                    for sp in anchor.findall(".//xdr:sp", DRAWING_NS):
-                        p_nodes = sp.findall(".//a:p", DRAWING_NS)
-                        if not p_nodes:
-                            continue
-
-                      
-                        has_content = False
-                        for p in p_nodes:
-                            for node in p:
-                                local = etree.QName(node).localname
-                                if local in ("r", "fld"):
-                                    t = node.find('{%s}t' % DRAWING_NS['a'])
-                                    if t is not None and t.text is not None:
-                                        has_content = True
-                                        break
-                                elif local == "br":
-                                    has_content = True
-                                    break
-                            if has_content:
-                                break
-
-                        if not has_content:
-                            continue
-
-                        if entry_idx >= len(entries):
-                            break
-
-                        entry = entries[entry_idx]
-                        para_trans_list = entry.get("paragraphs", [])
-
-            
-                        for p_idx, p_node in enumerate(p_nodes):
-                            if p_idx >= len(para_trans_list):
-                                break
-
-                            trans_para = para_trans_list[p_idx]
-                            run_idx = 0
-
-                          
-                            for node in p_node:
-                                local = etree.QName(node).localname
-
-                                if local in ("r", "fld"):
-                                    if run_idx < len(trans_para):
-                                        t = node.find('{%s}t' % DRAWING_NS['a'])
-                                        if t is not None:
-                                            t.text = trans_para[run_idx]
-                                    run_idx += 1
-                                elif local == "br":
-                                    run_idx += 1
-
-                        entry_idx += 1
-
-                tree.write(str(drawing_file), encoding="UTF-8", xml_declaration=True, standalone=True)
+                    drawing_part = DRAWINGS_DIR + fname
+                    tree = etree.parse(zin.open(drawing_part), get_parser())
+                    rewrite_drawing(tree.getroot(), runs)
 
-        
+                    modified[drawing_part] = serialize(tree)
 
-        recompile(extract_dir, Path(output_path))
-        try:
-            shutil.rmtree(EXTRACT_DIR)
-        except Exception:
-            pass
+        rewrite_archive(Path(original_path), Path(output_path), modified)
 
         return output_path
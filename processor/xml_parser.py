@@ -0,0 +1,40 @@
+import threading
+from lxml import etree
+
+# Parts come from user uploads: no entity expansion or network access, and
+# libxml2's default depth and text-size limits stay on. No ID table is needed.
+# Used for both the per-thread parsers and iterparse.
+PARSER_OPTIONS = dict(collect_ids=False, resolve_entities=False, no_network=True)
+
+# An XMLParser must not be used by two threads at once, and documents may be
+# processed concurrently, so each thread builds its own parsers on first use
+_local = threading.local()
+
+def get_parser() -> etree.XMLParser:
+    """Parser for parts that are written back; their whitespace is kept."""
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = etree.XMLParser(**PARSER_OPTIONS)
+    return parser
+
+def get_read_parser() -> etree.XMLParser:
+    """
+    Parser for parts that are only read. It drops indentation-only text nodes
+    between elements; whitespace inside leaf elements such as <a:t> is kept.
+    """
+    parser = getattr(_local, "read_parser", None)
+    if parser is None:
+        parser = _local.read_parser = etree.XMLParser(remove_blank_text=True, **PARSER_OPTIONS)
+    return parser
+
+def iter_elements(source, tag: str):
+    """
+    Stream the elements with the given tag from an XML file or stream, clearing
+    each one and its already-visited siblings once the caller is done with it,
+    so large parts never have to be held in memory as a whole.
+    """
+    for _, elem in etree.iterparse(source, events=("end",), tag=tag, **PARSER_OPTIONS):
+        yield elem
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
@@ -14,6 +14,28 @@ class FileStorageService:
     """Service for managing file operations with Supabase Storage"""
 
     BUCKET_NAME = os.getenv("SUPABASE_STORAGE_BUCKET")
+
+    # Content type by lowercase file extension
+    _EXT_MAP = {
+        ".pdf": "application/pdf",
+        ".doc": "application/msword",
+        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        ".txt": "text/plain",
+        ".html": "text/html",
+        ".htm": "text/html",
+        ".json": "application/json",
+        ".xml": "application/xml",
+        ".csv": "text/csv",
+        ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        ".png": "image/png",
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".gif": "image/gif",
+        ".svg": "image/svg+xml",
+        ".zip": "application/zip",
+        ".tar": "application/x-tar",
+        ".gz": "application/gzip",
+    }
     
     @staticmethod
     def upload_file(file_path: str, file_content: bytes) -> str:
@@ -103,37 +125,15 @@ class FileStorageService:
         except Exception as e:
             raise Exception(f"Error listing files: {str(e)}")
     
-    @staticmethod
-    def _get_content_type(file_path: str) -> str:
+    @classmethod
+    def _get_content_type(cls, file_path: str) -> str:
         """Get content type based on file extension"""
-        extension_map = {
-            ".pdf": "application/pdf",
-            ".doc": "application/msword",
-            ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            ".txt": "text/plain",
-            ".html": "text/html",
-            ".htm": "text/html",
-            ".json": "application/json",
-            ".xml": "application/xml",
-            ".csv": "text/csv",
-            ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".svg": "image/svg+xml",
-            ".zip": "application/zip",
-            ".tar": "application/x-tar",
-            ".gz": "application/gzip",
-        }
-        
-        file_lower = file_path.lower()
-        for ext, content_type in extension_map.items():
-            if file_lower.endswith(ext):
-                return content_type
-        
+        # Every key is a single dot-prefixed extension, so matching the text
+        # after the last dot is the same as the old endswith scan
+        _, dot, extension = file_path.lower().rpartition(".")
+
         # Default to binary/octet-stream if extension not found
-        return "application/octet-stream"
+        return cls._EXT_MAP.get(dot + extension, "application/octet-stream")
     
     @staticmethod
     def get_file_extension(file_path: str) -> str: